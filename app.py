@@ -1,8 +1,11 @@
 # app.py
 import os
-import io
 import csv
-from functools import wraps
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, wraps
+from itertools import zip_longest
 from datetime import datetime, timedelta
 from typing import Optional, List, Tuple, Any, Dict
 
@@ -11,17 +14,22 @@ load_dotenv()
 
 from flask import (
     Flask,
+    Response,
     render_template,
     request,
     redirect,
     url_for,
     flash,
-    send_file,
     session,
     jsonify,
     abort,
+    stream_with_context,
 )
 
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import joinedload
+from sqlalchemy.pool import NullPool
+
 from werkzeug.security import generate_password_hash, check_password_hash
 
 from models import (
@@ -38,10 +46,15 @@ from models import (
 )
 
 from reserve_math import recommend_levelized_full_funding_contribution
-from storage import put_object_bytes, delete_object, presign_get_url, make_storage_key
+from storage import put_object_fileobj, delete_object, delete_objects_bulk, presign_get_urls_batch, make_storage_key
 
 ALLOWED_IMAGE_MIMES = {"image/jpeg", "image/png", "image/webp"}
 
+# Pin the hash so a Werkzeug upgrade can't silently change cost params.
+# scrypt is memory-hard (weak GPU/ASIC speedup for attackers); 32768:8:1
+# lands around a couple hundred ms per hash on current hardware.
+PASSWORD_HASH_METHOD = "scrypt:32768:8:1"
+
 TIER_PRICES_CENTS = {
     "essentials": 50000,
     "plus": 170000,
@@ -61,23 +74,15 @@ def _db_uri() -> str:
     return uri
 
 
-def _storage_provider() -> str:
-    return (os.getenv("STORAGE_PROVIDER") or "s3").strip()
-
-
-def _storage_bucket() -> str:
-    b = (os.getenv("STORAGE_BUCKET") or "").strip()
-    if not b:
-        raise RuntimeError("STORAGE_BUCKET is not set (required for photo rows).")
-    return b
+@lru_cache(maxsize=None)
+def _model_columns(model_cls) -> frozenset:
+    """Mapped column names per model, walked once and memoized."""
+    return frozenset(attr.key for attr in db.inspect(model_cls).mapper.column_attrs)
 
 
 def _safe_model_kwargs(model_cls, data: Dict[str, Any]) -> Dict[str, Any]:
-    out = {}
-    for k, v in data.items():
-        if hasattr(model_cls, k):
-            out[k] = v
-    return out
+    allowed = _model_columns(model_cls)
+    return {k: v for k, v in data.items() if k in allowed}
 
 
 def _admin_emails_set() -> set:
@@ -121,13 +126,26 @@ def login_required(fn):
 
 def _require_property_access(u: User, prop_id: int) -> Property:
     if is_admin(u):
-        return Property.query.get_or_404(prop_id)
-    prop = Property.query.filter_by(id=prop_id, user_id=u.id).first()
+        prop = db.session.get(Property, prop_id)
+    else:
+        # 2.0-style select skips legacy Query overhead; backed by the
+        # (user_id, id) composite index so this is a single index seek.
+        prop = db.session.execute(
+            db.select(Property).filter_by(id=prop_id, user_id=u.id)
+        ).scalar_one_or_none()
     if not prop:
         abort(404)
     return prop
 
 
+def _get_component_with_study(component_id: int) -> ReserveComponent:
+    """Load a component with its study and property in one joined query;
+    the photo endpoints need all three for the access check."""
+    return ReserveComponent.query.options(
+        joinedload(ReserveComponent.study).joinedload(ReserveStudy.property)
+    ).get_or_404(component_id)
+
+
 def _require_study_access(u: User, study_id: int) -> ReserveStudy:
     study = ReserveStudy.query.get_or_404(study_id)
     if is_admin(u):
@@ -149,30 +167,44 @@ def _study_locked_for_user(u: User, study: ReserveStudy) -> bool:
     return (study.paid_status or "").lower() == "paid"
 
 
-def _validate_image_file(f) -> Tuple[Optional[Tuple[bytes, str]], Optional[str]]:
+def _validate_image_file(f) -> Tuple[Optional[Tuple[str, str]], Optional[str]]:
+    """
+    Validate the upload and spool it to a temp file on disk, so the full
+    body never sits in the Python heap. Returns ((tmp_path, mime), error);
+    the caller owns the temp file.
+    """
     if not f or not getattr(f, "filename", None):
         return None, "No file uploaded."
     mime = (f.mimetype or "").lower()
     if mime not in ALLOWED_IMAGE_MIMES:
         return None, f"Unsupported file type: {mime}"
-    raw = f.read()
-    if not raw:
+    if not f.stream.read(1):
         return None, "Empty file."
-    return (raw, mime), None
-
-
-def _parse_float(form, key, default=None):
-    v = (form.get(key) or "").strip()
-    if v == "":
-        return default
-    return float(v)
+    f.stream.seek(0)
+    tmp = tempfile.NamedTemporaryFile(prefix="photo-upload-", delete=False)
+    try:
+        shutil.copyfileobj(f.stream, tmp, length=64 * 1024)
+    except Exception:
+        tmp.close()
+        try:
+            os.unlink(tmp.name)
+        except OSError:
+            pass
+        raise
+    finally:
+        tmp.close()
+    return (tmp.name, mime), None
 
 
-def _parse_int(form, key, default=None):
-    v = (form.get(key) or "").strip()
-    if v == "":
-        return default
-    return int(v)
+def _discard_upload_spools(puts: List[Tuple[str, str, str]]) -> None:
+    """Unlink the temp files spooled for an upload batch that won't reach
+    _s3_put_task (a later file failed validation, or the DB write raised);
+    on the success path the task owns and removes them."""
+    for _storage_key, tmp_path, _mime in puts:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
 
 
 def _form_first(*keys: str) -> str:
@@ -226,24 +258,254 @@ def _pretty_money(cents: int) -> str:
     return f"${cents/100:,.0f}"
 
 
+# Prices are fixed at import time, so precompute the per-tier display tuple
+# (cents, label like "$500", tier name) once instead of re-deriving it per
+# request.
+TIER_DISPLAY = {
+    t: (cents, _pretty_money(cents), _tier_label(t))
+    for t, cents in TIER_PRICES_CENTS.items()
+}
+
+
+# Background pool for S3 I/O (PUTs and DELETEs): both are network-bound
+# and must not hold the request worker for the S3 round-trip time. A multi-file
+# request fans its PUTs out across the pool, so wall time for N files is
+# bounded by the slowest file, not the sum.
+try:
+    _UPLOAD_WORKERS = int(os.getenv("S3_UPLOAD_WORKERS", "8"))
+except ValueError:
+    _UPLOAD_WORKERS = 8
+_S3_EXECUTOR = ThreadPoolExecutor(max_workers=max(1, _UPLOAD_WORKERS), thread_name_prefix="s3-io")
+
+
+def _s3_put_task(flask_app, model_cls, row_id: int, storage_key: str, tmp_path: str, mime: str):
+    """Runs on _S3_EXECUTOR: stream the spooled file to S3, then flip
+    the row's upload_status so listings can tell pending photos from ready
+    ones. Owns (and removes) the temp file."""
+    try:
+        with open(tmp_path, "rb") as fh:
+            put_object_fileobj(storage_key, fh, mime)
+        status = "ready"
+    except Exception:
+        status = "failed"
+        flask_app.logger.exception(
+            "S3 upload failed for %s id=%s key=%s", model_cls.__name__, row_id, storage_key
+        )
+    finally:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+    with flask_app.app_context():
+        try:
+            row = db.session.get(model_cls, row_id)
+            if row is not None:
+                row.upload_status = status
+                db.session.commit()
+        except Exception:
+            # the row stays "pending" and pollers keep waiting — make sure
+            # operators can see why
+            db.session.rollback()
+            flask_app.logger.exception(
+                "Could not record upload_status=%s for %s id=%s", status, model_cls.__name__, row_id
+            )
+
+
+# Small dedicated pool for the CPU-bound projection math, so long-horizon
+# simulations don't queue behind S3 transfers (or vice versa).
+_COMPUTE_EXECUTOR = ThreadPoolExecutor(max_workers=2, thread_name_prefix="projection")
+
+
+def _study_component_payload(study_id: int) -> List[dict]:
+    """Component dicts for the simulation, read as plain column tuples."""
+    comp_rows = db.session.execute(
+        db.select(
+            ReserveComponent.name,
+            ReserveComponent.quantity,
+            ReserveComponent.useful_life_years,
+            ReserveComponent.remaining_life_years,
+            ReserveComponent.cycle_years,
+            ReserveComponent.current_replacement_cost,
+        ).where(ReserveComponent.study_id == study_id)
+    ).all()
+    return [{
+        "name": name,
+        "quantity": qty,
+        "useful_life_years": ul,
+        "remaining_life_years": rl,
+        "cycle_years": cyc or ul,
+        "current_replacement_cost": cost,
+    } for name, qty, ul, rl, cyc, cost in comp_rows]
+
+
+def _build_projection_task(flask_app, study_id: int):
+    """Runs on _COMPUTE_EXECUTOR: simulate the funding plan for a paid
+    study and persist the year rows + recommended contribution."""
+    with flask_app.app_context():
+        try:
+            study = db.session.get(ReserveStudy, study_id)
+            if study is None:
+                return
+            components = _study_component_payload(study_id)
+            if not components:
+                return
+
+            recommended_contrib, yearly = recommend_levelized_full_funding_contribution(
+                start_year=study.start_year,
+                horizon_years=study.horizon_years,
+                inflation_rate=study.inflation_rate,
+                interest_rate=study.interest_rate,
+                starting_balance=study.starting_balance,
+                components=components,
+                min_balance=study.min_balance,
+            )
+
+            ReserveYearResult.query.filter_by(study_id=study_id).delete(synchronize_session=False)
+
+            # One multi-row INSERT for the whole horizon instead of an ORM
+            # instance per year.
+            ReserveYearResult.bulk_create(study_id, yearly)
+
+            study.recommended_annual_contribution = float(recommended_contrib)
+            study.projection_status = "ready"
+            db.session.commit()
+        except Exception:
+            # A paid study with no projection must not look pending forever:
+            # log the failure and persist the marker so study_detail can say
+            # so instead of promising rows that will never arrive.
+            db.session.rollback()
+            flask_app.logger.exception("Projection build failed for study %s", study_id)
+            try:
+                study = db.session.get(ReserveStudy, study_id)
+                if study is not None:
+                    study.projection_status = "failed"
+                    db.session.commit()
+            except Exception:
+                db.session.rollback()
+                flask_app.logger.exception(
+                    "Could not record projection failure for study %s", study_id
+                )
+
+
+class _CsvLine:
+    """Pseudo-stream for csv.writer: writerow returns the formatted line so
+    it can be yielded straight into a streaming response."""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def _temp_photos_by_row_key(user_id: int, property_id: int, row_keys: List[str]) -> Dict[str, list]:
+    """
+    Fetch all pending temp photos for the given row keys in one IN() query
+    (index range on (user_id, property_id, row_key)) instead of one SELECT
+    per component row.
+    """
+    keys = [rk for rk in row_keys if rk]
+    if not keys:
+        return {}
+    temps = TempComponentPhoto.query.filter(
+        TempComponentPhoto.user_id == user_id,
+        TempComponentPhoto.property_id == property_id,
+        TempComponentPhoto.row_key.in_(keys),
+    ).all()
+    by_key: Dict[str, list] = {}
+    for tp in temps:
+        by_key.setdefault(tp.row_key, []).append(tp)
+    return by_key
+
+
+@lru_cache(maxsize=1)
+def _premium_schedule_options(day_ordinal: int) -> Tuple[datetime, ...]:
+    # Slots only change when the (UTC) day rolls over, so compute the list
+    # once per day and share it across all requests.
+    options = []
+    d = datetime.fromordinal(day_ordinal)
+    while len(options) < 10:
+        d += timedelta(days=1)
+        if d.weekday() in (5, 6):  # skip Sat/Sun
+            continue
+        options.append(datetime(d.year, d.month, d.day, 17, 0))  # 5pm UTC-ish
+    return tuple(options)
+
+
+def _commit_keep_loaded() -> None:
+    """Commit and release the connection without expiring loaded ORM
+    state. The handlers that presign or build JSON after committing would
+    otherwise trigger one refresh SELECT per row on the next attribute
+    access (expire_on_commit defaults to True), undoing the point of
+    releasing the connection early."""
+    session = db.session()
+    session.expire_on_commit = False
+    try:
+        session.commit()
+    finally:
+        session.expire_on_commit = True
+
+
 def _load_components_and_photos(study_id: int):
     components = ReserveComponent.query.filter_by(study_id=study_id).order_by(ReserveComponent.name.asc()).all()
-    comp_photos = {}
+    photos_by_comp = {}
     for c in components:
-        photos = ComponentPhoto.query.filter_by(component_id=c.id).order_by(ComponentPhoto.created_at.asc()).all()
-        comp_photos[c.id] = [{
+        photos_by_comp[c.id] = ComponentPhoto.query.filter_by(component_id=c.id).order_by(ComponentPhoto.created_at.asc()).all()
+
+    # All reads are done; release the connection back to the pool before the
+    # CPU-bound presign/HMAC work below.
+    _commit_keep_loaded()
+
+    comp_photos = {}
+    for cid, photos in photos_by_comp.items():
+        urls = presign_get_urls_batch([p.storage_key for p in photos], expires_seconds=900)
+        comp_photos[cid] = [{
             "id": p.id,
-            "url": presign_get_url(p.storage_key, expires_seconds=900),
+            "url": url,
             "name": (getattr(p, "filename", None) or getattr(p, "original_filename", None) or "photo")
-        } for p in photos]
+        } for p, url in zip(photos, urls)]
     return components, comp_photos
 
 
 # NEW: statuses that indicate an admin needs to do something
-ADMIN_NEEDS_REVIEW_STATUSES = {
+# frozenset: built once at import, hashable, and membership checks skip the
+# per-request set construction a literal would do.
+ADMIN_NEEDS_REVIEW_STATUSES = frozenset({
     "paid_awaiting_review",        # Plus paid, waiting for expert/admin review/approve
     "paid_pending_admin_build",    # Premium scheduled/paid, waiting for admin build + approve
-}
+})
+
+
+# Columns added to the models after deployments first booted: create_all
+# never ALTERs existing tables, so they have to be backfilled explicitly
+# at startup (same belt-and-braces approach as the explicit photo deletes
+# covering the FK-cascade gap). (table, column, DDL) — the DDL only runs
+# when the inspector says the column is missing, so up-to-date schemas
+# boot without touching anything.
+_SCHEMA_BACKFILLS = (
+    (
+        "component_photos",
+        "upload_status",
+        "ALTER TABLE component_photos ADD COLUMN upload_status VARCHAR(20) NOT NULL DEFAULT 'ready'",
+    ),
+    (
+        "temp_component_photos",
+        "upload_status",
+        "ALTER TABLE temp_component_photos ADD COLUMN upload_status VARCHAR(20) NOT NULL DEFAULT 'ready'",
+    ),
+    (
+        "reserve_studies",
+        "projection_status",
+        "ALTER TABLE reserve_studies ADD COLUMN projection_status VARCHAR(20) NOT NULL DEFAULT 'ready'",
+    ),
+)
+
+
+def _apply_schema_backfills() -> None:
+    insp = sa_inspect(db.engine)
+    for table, column, ddl in _SCHEMA_BACKFILLS:
+        if not insp.has_table(table):
+            continue
+        if column not in {c["name"] for c in insp.get_columns(table)}:
+            db.session.execute(db.text(ddl))
+    db.session.commit()
 
 
 # --------------------
@@ -258,17 +520,53 @@ def create_app():
     )
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 
+    # One-shot scripts (create_user, cron) set FLASK_SCRIPT=1: NullPool
+    # returns the connection the moment the session is done, so short runs
+    # don't hold a pooled connection open — PgBouncer keeps the warm
+    # backend. The web app keeps the default QueuePool.
+    if os.getenv("FLASK_SCRIPT") == "1":
+        app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {"poolclass": NullPool}
+
     app.config["SESSION_COOKIE_HTTPONLY"] = True
     app.config["SESSION_COOKIE_SAMESITE"] = "Lax"
     app.config["SESSION_COOKIE_SECURE"] = True  # keep True on Render/HTTPS
 
-    app.config["STORAGE_PROVIDER"] = _storage_provider()
-    app.config["STORAGE_BUCKET"] = _storage_bucket()
+    # Read storage env exactly once here; request-time code must use
+    # app.config, never os.getenv.
+    app.config["STORAGE_PROVIDER"] = (os.getenv("STORAGE_PROVIDER") or "s3").strip()
+    storage_bucket = (os.getenv("STORAGE_BUCKET") or "").strip()
+    if not storage_bucket:
+        raise RuntimeError("STORAGE_BUCKET is not set (required for photo rows).")
+    app.config["STORAGE_BUCKET"] = storage_bucket
 
     db.init_app(app)
 
     with app.app_context():
         db.create_all()
+        _apply_schema_backfills()
+
+    # Warm the reserve-math kernel once per worker at startup so the first
+    # real study compute doesn't also pay CPython's adaptive-interpreter
+    # specialization of the simulation loops.
+    try:
+        recommend_levelized_full_funding_contribution(
+            start_year=datetime.utcnow().year,
+            horizon_years=5,
+            inflation_rate=0.03,
+            interest_rate=0.01,
+            starting_balance=0.0,
+            components=[{
+                "name": "warmup",
+                "quantity": 1,
+                "useful_life_years": 5,
+                "remaining_life_years": 2,
+                "cycle_years": 5,
+                "current_replacement_cost": 1000.0,
+            }],
+            min_balance=0.0,
+        )
+    except Exception:
+        pass
 
     @app.context_processor
     def inject_user():
@@ -327,7 +625,7 @@ def create_app():
         admin_emails = _admin_emails_set()
         make_admin = email in admin_emails
 
-        u = User(email=email, password_hash=generate_password_hash(password), is_admin=make_admin)
+        u = User(email=email, password_hash=generate_password_hash(password, method=PASSWORD_HASH_METHOD), is_admin=make_admin)
         db.session.add(u)
         db.session.commit()
 
@@ -351,8 +649,9 @@ def create_app():
 
         u = User.query.filter_by(email=email).first()
         if u and check_password_hash(u.password_hash, password):
-            admin_emails = _admin_emails_set()
-            if email in admin_emails and not u.is_admin:
+            # Cheap flag check first: already-admin logins skip both the env
+            # scan and the promotion commit entirely.
+            if not u.is_admin and email in _admin_emails_set():
                 u.is_admin = True
                 db.session.commit()
 
@@ -387,9 +686,11 @@ def create_app():
             props = Property.query.order_by(Property.created_at.desc()).all()
 
             # Count "needs review" studies by property so we can show a column + float to top.
+            # Compare case-insensitively in SQL; the column is written
+            # lower-case everywhere, but legacy rows may not be.
             rows = (
                 db.session.query(ReserveStudy.property_id, db.func.count(ReserveStudy.id))
-                .filter(ReserveStudy.workflow_status.in_(list(ADMIN_NEEDS_REVIEW_STATUSES)))
+                .filter(db.func.lower(ReserveStudy.workflow_status).in_(list(ADMIN_NEEDS_REVIEW_STATUSES)))
                 .group_by(ReserveStudy.property_id)
                 .all()
             )
@@ -488,9 +789,9 @@ def create_app():
             premium_reqs=premium_reqs,
             is_admin=is_admin(u),  # IMPORTANT: template needs this for Admin tools
             tier_prices={
-                "essentials": _pretty_money(_tier_price_cents("essentials")),
-                "plus": _pretty_money(_tier_price_cents("plus")),
-                "premium": _pretty_money(_tier_price_cents("premium")),
+                "essentials": TIER_DISPLAY["essentials"][1],
+                "plus": TIER_DISPLAY["plus"][1],
+                "premium": TIER_DISPLAY["premium"][1],
             }
         )
 
@@ -592,7 +893,7 @@ def create_app():
             study=None,
             tier=tier,
             is_locked=False,
-            tier_price=_pretty_money(_tier_price_cents(tier)),
+            tier_price=TIER_DISPLAY[tier][1],
             # New: templates can use this to decide whether to show approve controls
             admin_can_approve=False,
             admin_approve_url=None,
@@ -612,10 +913,17 @@ def create_app():
 
         components = ReserveComponent.query.filter_by(study_id=study.id).order_by(ReserveComponent.id.asc()).all()
 
-        comp_photos = {}
+        photos_by_comp = {}
         for c in components:
-            photos = ComponentPhoto.query.filter_by(component_id=c.id).order_by(ComponentPhoto.created_at.asc()).all()
-            comp_photos[c.id] = [{"id": p.id, "url": presign_get_url(p.storage_key, expires_seconds=900), "name": (getattr(p, "filename", None) or getattr(p, "original_filename", None) or "photo")} for p in photos]
+            photos_by_comp[c.id] = ComponentPhoto.query.filter_by(component_id=c.id).order_by(ComponentPhoto.created_at.asc()).all()
+
+        # Reads done; free the connection before presigning.
+        _commit_keep_loaded()
+
+        comp_photos = {}
+        for cid, photos in photos_by_comp.items():
+            urls = presign_get_urls_batch([p.storage_key for p in photos], expires_seconds=900)
+            comp_photos[cid] = [{"id": p.id, "url": url, "name": (getattr(p, "filename", None) or getattr(p, "original_filename", None) or "photo")} for p, url in zip(photos, urls)]
 
         defaults = {
             "start_year": study.start_year,
@@ -704,7 +1012,7 @@ def create_app():
             user_id=u.id,
             property_id=prop.id,
             paid=False,
-            paid_amount_cents=_tier_price_cents("premium"),
+            paid_amount_cents=TIER_DISPLAY["premium"][0],
             status="created",
             meta=None,
         )
@@ -724,8 +1032,8 @@ def create_app():
         return render_template(
             "premium_checkout.html",
             pr=pr,
-            price_cents=_tier_price_cents("premium"),
-            price_label=_pretty_money(_tier_price_cents("premium")),
+            price_cents=TIER_DISPLAY["premium"][0],
+            price_label=TIER_DISPLAY["premium"][1],
         )
 
     @app.post("/premium/<int:premium_request_id>/checkout/simulate-success")
@@ -738,7 +1046,7 @@ def create_app():
 
         pr.paid = True
         pr.status = "paid_pending_schedule"
-        pr.paid_amount_cents = _tier_price_cents("premium")
+        pr.paid_amount_cents = TIER_DISPLAY["premium"][0]
         db.session.commit()
 
         flash("Payment successful (simulated). Please choose an on-site inspection time.")
@@ -755,15 +1063,7 @@ def create_app():
             flash("Please complete payment first.")
             return redirect(url_for("premium_checkout", premium_request_id=pr.id))
 
-        options = []
-        base = datetime.utcnow()
-        d = base
-        while len(options) < 10:
-            d += timedelta(days=1)
-            if d.weekday() in (5, 6):  # skip Sat/Sun
-                continue
-            opt = datetime(d.year, d.month, d.day, 17, 0)  # 5pm UTC-ish
-            options.append(opt)
+        options = _premium_schedule_options(datetime.utcnow().date().toordinal())
         return render_template("premium_schedule.html", pr=pr, options=options)
 
     @app.post("/premium/<int:premium_request_id>/schedule")
@@ -833,9 +1133,11 @@ def create_app():
         _require_property_access(u, prop_id)
 
         rows = TempComponentPhoto.query.filter_by(user_id=u.id, property_id=prop_id, row_key=row_key).order_by(TempComponentPhoto.created_at.asc()).all()
+        _commit_keep_loaded()  # release connection before presigning
+        urls = presign_get_urls_batch([r.storage_key for r in rows], expires_seconds=900)
         return jsonify({
             "ok": True,
-            "photos": [{"id": r.id, "name": (getattr(r, "filename", None) or "photo"), "url": presign_get_url(r.storage_key, expires_seconds=900)} for r in rows],
+            "photos": [{"id": r.id, "name": (getattr(r, "filename", None) or "photo"), "url": url, "upload_status": r.upload_status} for r, url in zip(rows, urls)],
         })
 
     @app.post("/temp/component-photo")
@@ -863,40 +1165,61 @@ def create_app():
         bucket = app.config["STORAGE_BUCKET"]
 
         created = []
-        for f in files:
-            validated, err = _validate_image_file(f)
-            if err:
-                return jsonify({"ok": False, "error": err}), 400
-            raw, mime = validated
-
-            storage_key = make_storage_key(
-                f"users/{u.id}",
-                f"properties/{prop.id}",
-                "temp/components",
-                row_key,
-                filename=f.filename,
-            )
-            put_object_bytes(storage_key, raw, mime)
-
-            data = {
-                "user_id": u.id,
-                "property_id": prop.id,
-                "row_key": row_key,
-                "storage_provider": provider,
-                "storage_bucket": bucket,
-                "storage_key": storage_key,
-                "filename": f.filename,
-                "content_type": mime,
-                "created_at": datetime.utcnow(),
-            }
-            row = TempComponentPhoto(**_safe_model_kwargs(TempComponentPhoto, data))
-            db.session.add(row)
-            db.session.flush()
+        puts = []  # (storage_key, tmp_path, mime) per created row
+        now = datetime.utcnow()  # one timestamp shared by the whole batch
+        # Any exit before the executor submits below must unlink the
+        # spooled temp files; only _s3_put_task cleans up after itself.
+        try:
+            for f in files:
+                validated, err = _validate_image_file(f)
+                if err:
+                    _discard_upload_spools(puts)
+                    return jsonify({"ok": False, "error": err}), 400
+                tmp_path, mime = validated
+
+                storage_key = make_storage_key(
+                    f"users/{u.id}",
+                    f"properties/{prop.id}",
+                    "temp/components",
+                    row_key,
+                    filename=f.filename,
+                )
+                puts.append((storage_key, tmp_path, mime))
+
+                data = {
+                    "user_id": u.id,
+                    "property_id": prop.id,
+                    "row_key": row_key,
+                    "storage_provider": provider,
+                    "storage_bucket": bucket,
+                    "storage_key": storage_key,
+                    "filename": f.filename,
+                    "content_type": mime,
+                    "upload_status": "pending",
+                    "created_at": now,
+                }
+                created.append(TempComponentPhoto(**_safe_model_kwargs(TempComponentPhoto, data)))
+
+            # One INSERT batch instead of a flush round-trip per file; the
+            # commit populates all generated IDs and keeps the instances live
+            # for the presign/JSON pass below.
+            db.session.add_all(created)
+            _commit_keep_loaded()
+        except Exception:
+            db.session.rollback()
+            _discard_upload_spools(puts)
+            raise
 
-            created.append({"id": row.id, "name": f.filename or "photo", "url": presign_get_url(storage_key, expires_seconds=900)})
+        # Rows are durable; hand the S3 PUTs to the background pool so the
+        # response isn't held for N x S3 round-trip time.
+        for row, (storage_key, tmp_path, mime) in zip(created, puts):
+            _S3_EXECUTOR.submit(_s3_put_task, app, TempComponentPhoto, row.id, storage_key, tmp_path, mime)
 
-        db.session.commit()
-        return jsonify({"ok": True, "created": created})
+        # Presign once for the whole batch after the rows are stored.
+        urls = presign_get_urls_batch([r.storage_key for r in created], expires_seconds=900)
+        return jsonify({"ok": True, "created": [
+            {"id": r.id, "name": r.filename or "photo", "url": url, "upload_status": r.upload_status} for r, url in zip(created, urls)
+        ]})
 
     @app.delete("/temp/component-photo/<int:temp_photo_id>")
     @login_required
@@ -906,13 +1229,14 @@ def create_app():
         if row.user_id != u.id and not is_admin(u):
             abort(403)
 
-        try:
-            delete_object(row.storage_key)
-        except Exception:
-            pass
-
+        storage_key = row.storage_key
         db.session.delete(row)
         db.session.commit()
+
+        # Row delete is durable; now destroy the object, off the request
+        # path (the old code swallowed delete errors anyway). Submitting
+        # before the commit could orphan a surviving row on rollback.
+        _S3_EXECUTOR.submit(delete_object, storage_key)
         return jsonify({"ok": True})
 
     # --------------------
@@ -922,7 +1246,7 @@ def create_app():
     @login_required
     def list_component_photos(component_id: int):
         u = current_user()
-        comp = ReserveComponent.query.get_or_404(component_id)
+        comp = _get_component_with_study(component_id)
         study = comp.study
         if not study or not study.property:
             abort(404)
@@ -931,16 +1255,18 @@ def create_app():
             abort(403)
 
         photos = ComponentPhoto.query.filter_by(component_id=component_id).order_by(ComponentPhoto.created_at.asc()).all()
+        _commit_keep_loaded()  # release connection before presigning
+        urls = presign_get_urls_batch([p.storage_key for p in photos], expires_seconds=900)
         return jsonify({
             "ok": True,
-            "photos": [{"id": p.id, "name": (getattr(p, "filename", None) or "photo"), "url": presign_get_url(p.storage_key, expires_seconds=900)} for p in photos],
+            "photos": [{"id": p.id, "name": (getattr(p, "filename", None) or "photo"), "url": url, "upload_status": p.upload_status} for p, url in zip(photos, urls)],
         })
 
     @app.post("/components/<int:component_id>/photos")
     @login_required
     def upload_component_photo(component_id: int):
         u = current_user()
-        comp = ReserveComponent.query.get_or_404(component_id)
+        comp = _get_component_with_study(component_id)
         study = comp.study
         if not study or not study.property:
             abort(404)
@@ -964,45 +1290,70 @@ def create_app():
         bucket = app.config["STORAGE_BUCKET"]
 
         created = []
-        for f in files:
-            validated, err = _validate_image_file(f)
-            if err:
-                return jsonify({"ok": False, "error": err}), 400
-            raw, mime = validated
-
-            storage_key = make_storage_key(
-                f"users/{study.property.user_id}",
-                f"properties/{study.property_id}",
-                f"studies/{study.id}",
-                f"components/{comp.id}",
-                filename=f.filename,
-            )
-            put_object_bytes(storage_key, raw, mime)
-
-            data = {
-                "component_id": comp.id,
-                "storage_provider": provider,
-                "storage_bucket": bucket,
-                "storage_key": storage_key,
-                "filename": f.filename,
-                "content_type": mime,
-                "created_at": datetime.utcnow(),
-            }
-            photo = ComponentPhoto(**_safe_model_kwargs(ComponentPhoto, data))
-            db.session.add(photo)
-            db.session.flush()
+        puts = []  # (storage_key, tmp_path, mime) per created row
+        now = datetime.utcnow()  # one timestamp shared by the whole batch
+        # Any exit before the executor submits below must unlink the
+        # spooled temp files; only _s3_put_task cleans up after itself.
+        try:
+            for f in files:
+                validated, err = _validate_image_file(f)
+                if err:
+                    _discard_upload_spools(puts)
+                    return jsonify({"ok": False, "error": err}), 400
+                tmp_path, mime = validated
+
+                storage_key = make_storage_key(
+                    f"users/{study.property.user_id}",
+                    f"properties/{study.property_id}",
+                    f"studies/{study.id}",
+                    f"components/{comp.id}",
+                    filename=f.filename,
+                )
+                puts.append((storage_key, tmp_path, mime))
+
+                data = {
+                    "component_id": comp.id,
+                    "storage_provider": provider,
+                    "storage_bucket": bucket,
+                    "storage_key": storage_key,
+                    "filename": f.filename,
+                    "content_type": mime,
+                    "upload_status": "pending",
+                    "created_at": now,
+                }
+                created.append(ComponentPhoto(**_safe_model_kwargs(ComponentPhoto, data)))
+
+            # One INSERT batch instead of a flush round-trip per file; the
+            # commit populates all generated IDs and keeps the instances live
+            # for the presign/JSON pass below.
+            db.session.add_all(created)
+            _commit_keep_loaded()
+        except Exception:
+            db.session.rollback()
+            _discard_upload_spools(puts)
+            raise
 
-            created.append({"id": photo.id, "name": f.filename or "photo", "url": presign_get_url(storage_key, expires_seconds=900)})
+        # Rows are durable; hand the S3 PUTs to the background pool so the
+        # response isn't held for N x S3 round-trip time.
+        for photo, (storage_key, tmp_path, mime) in zip(created, puts):
+            _S3_EXECUTOR.submit(_s3_put_task, app, ComponentPhoto, photo.id, storage_key, tmp_path, mime)
 
-        db.session.commit()
-        return jsonify({"ok": True, "created": created})
+        # Presign once for the whole batch after the rows are stored.
+        urls = presign_get_urls_batch([p.storage_key for p in created], expires_seconds=900)
+        return jsonify({"ok": True, "created": [
+            {"id": p.id, "name": p.filename or "photo", "url": url, "upload_status": p.upload_status} for p, url in zip(created, urls)
+        ]})
 
     @app.delete("/components/photos/<int:photo_id>")
     @login_required
     def delete_component_photo(photo_id: int):
         u = current_user()
-        photo = ComponentPhoto.query.get_or_404(photo_id)
-        comp = ReserveComponent.query.get_or_404(photo.component_id)
+        photo = ComponentPhoto.query.options(
+            joinedload(ComponentPhoto.component)
+            .joinedload(ReserveComponent.study)
+            .joinedload(ReserveStudy.property)
+        ).get_or_404(photo_id)
+        comp = photo.component
         study = comp.study
         if not study or not study.property:
             abort(404)
@@ -1013,13 +1364,14 @@ def create_app():
         if _study_locked_for_user(u, study):
             return jsonify({"ok": False, "error": "Study is locked for editing."}), 403
 
-        try:
-            delete_object(photo.storage_key)
-        except Exception:
-            pass
-
+        storage_key = photo.storage_key
         db.session.delete(photo)
         db.session.commit()
+
+        # Row delete is durable; now destroy the object, off the request
+        # path (the old code swallowed delete errors anyway). Submitting
+        # before the commit could orphan a surviving row on rollback.
+        _S3_EXECUTOR.submit(delete_object, storage_key)
         return jsonify({"ok": True})
 
     # --------------------
@@ -1039,12 +1391,14 @@ def create_app():
                 flash("Invalid tier for self-service study.")
                 return redirect(url_for("property_page", property_id=prop.id))
 
-            start_year = _parse_int(request.form, "start_year", datetime.utcnow().year)
-            horizon_years = _parse_int(request.form, "horizon_years", 30)
-            inflation_rate = _parse_float(request.form, "inflation_rate", 0.03)
-            interest_rate = _parse_float(request.form, "interest_rate", 0.01)
-            starting_balance = _parse_float(request.form, "starting_balance", 0.0)
-            min_balance = _parse_float(request.form, "min_balance", 0.0)
+            # Werkzeug's typed get is C-backed and falls back to the default on
+            # empty/invalid values, so no stripping helpers needed.
+            start_year = request.form.get("start_year", datetime.utcnow().year, type=int)
+            horizon_years = request.form.get("horizon_years", 30, type=int)
+            inflation_rate = request.form.get("inflation_rate", 0.03, type=float)
+            interest_rate = request.form.get("interest_rate", 0.01, type=float)
+            starting_balance = request.form.get("starting_balance", 0.0, type=float)
+            min_balance = request.form.get("min_balance", 0.0, type=float)
             funding_method = (request.form.get("funding_method") or "full").strip()
             contribution_mode = (request.form.get("contribution_mode") or "levelized").strip()
 
@@ -1056,18 +1410,22 @@ def create_app():
             cycles = request.form.getlist("cycle_years[]")
             row_keys = request.form.getlist("row_key[]")
 
+            # Single zip walk over the pre-fetched lists; getlist values are
+            # already strings, so no str() casts or index bounds checks.
             payload = []
-            for i in range(len(names)):
-                nm = (names[i] or "").strip()
+            for nm, ul, rl, cost, qty, cyc, rk in zip_longest(
+                names, uls, rls, costs, qtys, cycles, row_keys, fillvalue=""
+            ):
+                nm = nm.strip()
                 if not nm:
                     continue
 
-                ul = int(uls[i]) if str(uls[i]).strip() else 1
-                rl = int(rls[i]) if str(rls[i]).strip() else 0
-                cost = float(costs[i]) if str(costs[i]).strip() else 0.0
-                qty = int(qtys[i]) if i < len(qtys) and str(qtys[i]).strip() else 1
-                cyc = int(cycles[i]) if i < len(cycles) and str(cycles[i]).strip() else ul
-                rk = (row_keys[i] if i < len(row_keys) else "").strip()
+                ul = int(ul) if ul.strip() else 1
+                rl = int(rl) if rl.strip() else 0
+                cost = float(cost) if cost.strip() else 0.0
+                qty = int(qty) if qty.strip() else 1
+                cyc = int(cyc) if cyc.strip() else ul
+                rk = rk.strip()
 
                 payload.append({
                     "name": nm,
@@ -1083,6 +1441,10 @@ def create_app():
                 flash("Please add at least one component.")
                 return redirect(url_for("new_study", property_id=prop.id, tier=tier))
 
+            # SAVEPOINT: the study + components + photo conversion below are
+            # one atomic write set; a failure rolls back only these writes.
+            db.session.begin_nested()
+
             study = ReserveStudy(
                 property_id=prop.id,
                 tier=tier,
@@ -1104,8 +1466,8 @@ def create_app():
             provider = app.config["STORAGE_PROVIDER"]
             bucket = app.config["STORAGE_BUCKET"]
 
-            for c in payload:
-                comp = ReserveComponent(
+            comps = [
+                ReserveComponent(
                     study_id=study.id,
                     name=c["name"],
                     quantity=c["quantity"],
@@ -1114,17 +1476,17 @@ def create_app():
                     cycle_years=c["cycle_years"],
                     current_replacement_cost=c["current_replacement_cost"],
                 )
-                db.session.add(comp)
-                db.session.flush()
+                for c in payload
+            ]
+            db.session.add_all(comps)
+            db.session.flush()  # one flush populates every component id
 
-                if c["row_key"]:
-                    temps = TempComponentPhoto.query.filter_by(
-                        user_id=u.id,
-                        property_id=prop.id,
-                        row_key=c["row_key"],
-                    ).all()
+            temps_by_key = _temp_photos_by_row_key(u.id, prop.id, [c["row_key"] for c in payload])
 
-                    for tp in temps:
+            now = datetime.utcnow()  # one timestamp shared by the whole batch
+            for c, comp in zip(payload, comps):
+                if c["row_key"]:
+                    for tp in temps_by_key.get(c["row_key"], []):
                         data = {
                             "component_id": comp.id,
                             "storage_provider": getattr(tp, "storage_provider", None) or provider,
@@ -1132,7 +1494,8 @@ def create_app():
                             "storage_key": tp.storage_key,
                             "filename": getattr(tp, "filename", None),
                             "content_type": getattr(tp, "content_type", None),
-                            "created_at": datetime.utcnow(),
+                            "upload_status": getattr(tp, "upload_status", None) or "ready",
+                            "created_at": now,
                         }
                         db.session.add(ComponentPhoto(**_safe_model_kwargs(ComponentPhoto, data)))
                         db.session.delete(tp)
@@ -1176,6 +1539,9 @@ def create_app():
             return redirect(url_for("study_detail", study_id=study.id))
 
         try:
+            # Only snapshot the before-state when this edit will actually be
+            # audited; the common non-audited path skips the allocation.
+            audit_on = _audit_enabled_for_study_actor(study, u)
             before = {
                 "start_year": study.start_year,
                 "horizon_years": study.horizon_years,
@@ -1185,14 +1551,18 @@ def create_app():
                 "min_balance": study.min_balance,
                 "funding_method": study.funding_method,
                 "contribution_mode": study.contribution_mode,
-            }
-
-            study.start_year = _parse_int(request.form, "start_year", study.start_year)
-            study.horizon_years = _parse_int(request.form, "horizon_years", study.horizon_years)
-            study.inflation_rate = _parse_float(request.form, "inflation_rate", study.inflation_rate)
-            study.interest_rate = _parse_float(request.form, "interest_rate", study.interest_rate)
-            study.starting_balance = _parse_float(request.form, "starting_balance", study.starting_balance)
-            study.min_balance = _parse_float(request.form, "min_balance", study.min_balance)
+            } if audit_on else None
+
+            # SAVEPOINT: study fields + component upserts/deletes below are
+            # one atomic write set; a failure rolls back only these writes.
+            db.session.begin_nested()
+
+            study.start_year = request.form.get("start_year", study.start_year, type=int)
+            study.horizon_years = request.form.get("horizon_years", study.horizon_years, type=int)
+            study.inflation_rate = request.form.get("inflation_rate", study.inflation_rate, type=float)
+            study.interest_rate = request.form.get("interest_rate", study.interest_rate, type=float)
+            study.starting_balance = request.form.get("starting_balance", study.starting_balance, type=float)
+            study.min_balance = request.form.get("min_balance", study.min_balance, type=float)
             study.funding_method = (request.form.get("funding_method") or study.funding_method or "full").strip()
             study.contribution_mode = (request.form.get("contribution_mode") or study.contribution_mode or "levelized").strip()
 
@@ -1205,20 +1575,24 @@ def create_app():
             component_ids = request.form.getlist("component_id[]")
             row_keys = request.form.getlist("row_key[]")
 
+            # Single zip walk over the pre-fetched lists; getlist values are
+            # already strings, so no str() casts or index bounds checks.
             incoming = []
-            for i in range(len(names)):
-                nm = (names[i] or "").strip()
+            for nm, ul, rl, cost, qty, cyc, cid, rk in zip_longest(
+                names, uls, rls, costs, qtys, cycles, component_ids, row_keys, fillvalue=""
+            ):
+                nm = nm.strip()
                 if not nm:
                     continue
 
-                ul = int(uls[i]) if str(uls[i]).strip() else 1
-                rl = int(rls[i]) if str(rls[i]).strip() else 0
-                cost = float(costs[i]) if str(costs[i]).strip() else 0.0
-                qty = int(qtys[i]) if i < len(qtys) and str(qtys[i]).strip() else 1
-                cyc = int(cycles[i]) if str(cycles[i]).strip() else ul
+                ul = int(ul) if ul.strip() else 1
+                rl = int(rl) if rl.strip() else 0
+                cost = float(cost) if cost.strip() else 0.0
+                qty = int(qty) if qty.strip() else 1
+                cyc = int(cyc) if cyc.strip() else ul
 
-                cid = (component_ids[i] if i < len(component_ids) else "").strip()
-                rk = (row_keys[i] if i < len(row_keys) else "").strip()
+                cid = cid.strip()
+                rk = rk.strip()
 
                 incoming.append({
                     "component_id": int(cid) if cid else None,
@@ -1242,6 +1616,7 @@ def create_app():
             provider = app.config["STORAGE_PROVIDER"]
             bucket = app.config["STORAGE_BUCKET"]
 
+            new_rows = []  # (incoming row, new ReserveComponent)
             for row in incoming:
                 if row["component_id"] and row["component_id"] in existing_by_id:
                     c = existing_by_id[row["component_id"]]
@@ -1262,34 +1637,55 @@ def create_app():
                         cycle_years=row["cycle_years"],
                         current_replacement_cost=row["current_replacement_cost"],
                     )
-                    db.session.add(c)
-                    db.session.flush()
-                    keep_ids.add(c.id)
+                    new_rows.append((row, c))
 
-                    if row["row_key"]:
-                        temps = TempComponentPhoto.query.filter_by(
-                            user_id=u.id,
-                            property_id=study.property_id,
-                            row_key=row["row_key"],
-                        ).all()
-                        for tp in temps:
-                            data = {
-                                "component_id": c.id,
-                                "storage_provider": getattr(tp, "storage_provider", None) or provider,
-                                "storage_bucket": getattr(tp, "storage_bucket", None) or bucket,
-                                "storage_key": tp.storage_key,
-                                "filename": getattr(tp, "filename", None),
-                                "content_type": getattr(tp, "content_type", None),
-                                "created_at": datetime.utcnow(),
-                            }
-                            db.session.add(ComponentPhoto(**_safe_model_kwargs(ComponentPhoto, data)))
-                            db.session.delete(tp)
-
-            for c in existing:
-                if c.id not in keep_ids:
-                    db.session.delete(c)
+            db.session.add_all([c for _, c in new_rows])
+            db.session.flush()  # one flush populates every new component id
+            keep_ids.update(c.id for _, c in new_rows)
 
-            if _audit_enabled_for_study_actor(study, u):
+            temps_by_key = _temp_photos_by_row_key(u.id, study.property_id, [row["row_key"] for row, _ in new_rows])
+
+            now = datetime.utcnow()  # one timestamp shared by the whole batch
+            for row, c in new_rows:
+                if row["row_key"]:
+                    for tp in temps_by_key.get(row["row_key"], []):
+                        data = {
+                            "component_id": c.id,
+                            "storage_provider": getattr(tp, "storage_provider", None) or provider,
+                            "storage_bucket": getattr(tp, "storage_bucket", None) or bucket,
+                            "storage_key": tp.storage_key,
+                            "filename": getattr(tp, "filename", None),
+                            "content_type": getattr(tp, "content_type", None),
+                            "upload_status": getattr(tp, "upload_status", None) or "ready",
+                            "created_at": now,
+                        }
+                        db.session.add(ComponentPhoto(**_safe_model_kwargs(ComponentPhoto, data)))
+                        db.session.delete(tp)
+
+            # Bulk-delete removed components (and their photo rows) in two
+            # statements instead of one ORM DELETE per row. The explicit
+            # photo delete covers engines where the FK cascade isn't active.
+            removed_ids = [c.id for c in existing if c.id not in keep_ids]
+            removed_keys = []
+            if removed_ids:
+                # Collect the removed components' stored photo keys now
+                # (previously left orphaned in the bucket); the actual
+                # DeleteObjects is submitted only after the commit below,
+                # so a rollback never leaves photo rows pointing at
+                # already-destroyed objects.
+                removed_keys = db.session.execute(
+                    db.select(ComponentPhoto.storage_key).where(
+                        ComponentPhoto.component_id.in_(removed_ids)
+                    )
+                ).scalars().all()
+                ComponentPhoto.query.filter(
+                    ComponentPhoto.component_id.in_(removed_ids)
+                ).delete(synchronize_session=False)
+                ReserveComponent.query.filter(
+                    ReserveComponent.id.in_(removed_ids)
+                ).delete(synchronize_session=False)
+
+            if audit_on:
                 log_audit(u, "user_update_draft", "reserve_study", study.id, meta={
                     "tier": (study.tier or "").lower(),
                     "before": before,
@@ -1307,6 +1703,13 @@ def create_app():
                 })
 
             db.session.commit()
+
+            # Row deletes are durable; now it's safe to destroy the
+            # removed components' objects, off the request path like the
+            # other S3 deletes.
+            if removed_keys:
+                _S3_EXECUTOR.submit(delete_objects_bulk, removed_keys)
+
             flash("Draft saved.")
             return redirect(url_for("edit_study", study_id=study.id))
 
@@ -1332,13 +1735,13 @@ def create_app():
             flash("Premium requests are handled separately.")
             return redirect(url_for("property_page", property_id=study.property_id))
 
-        price_cents = _tier_price_cents(tier)
+        price_cents, price_label, tier_label = TIER_DISPLAY[tier]
         return render_template(
             "checkout.html",
             study=study,
             price_cents=price_cents,
-            price_label=_pretty_money(price_cents),
-            tier_label=_tier_label(tier),
+            price_label=price_label,
+            tier_label=tier_label,
         )
 
     @app.post("/studies/<int:study_id>/checkout/simulate-success")
@@ -1355,46 +1758,19 @@ def create_app():
             flash("Premium requests are handled separately.")
             return redirect(url_for("property_page", property_id=study.property_id))
 
-        components = [{
-            "name": c.name,
-            "quantity": c.quantity,
-            "useful_life_years": c.useful_life_years,
-            "remaining_life_years": c.remaining_life_years,
-            "cycle_years": c.cycle_years or c.useful_life_years,
-            "current_replacement_cost": c.current_replacement_cost,
-        } for c in study.components]
-
-        recommended_contrib = None
-        yearly = []
-
-        if components:
-            recommended_contrib, yearly = recommend_levelized_full_funding_contribution(
-                start_year=study.start_year,
-                horizon_years=study.horizon_years,
-                inflation_rate=study.inflation_rate,
-                interest_rate=study.interest_rate,
-                starting_balance=study.starting_balance,
-                components=components,
-                min_balance=study.min_balance,
-            )
+        has_components = db.session.execute(
+            db.select(ReserveComponent.id).where(ReserveComponent.study_id == study.id).limit(1)
+        ).first() is not None
 
-            ReserveYearResult.query.filter_by(study_id=study.id).delete()
+        # SAVEPOINT: result wipe + status flip commit as one unit, so a
+        # concurrent checkout can't observe a half-applied study. The heavy
+        # projection math runs off-request afterwards.
+        db.session.begin_nested()
 
-            for row in yearly:
-                kwargs = dict(
-                    study_id=study.id,
-                    year=row["year"],
-                    starting_balance=row["starting_balance"],
-                    contributions=row["contributions"],
-                    expenses=row["expenses"],
-                    interest_earned=row["interest_earned"],
-                    ending_balance=row["ending_balance"],
-                    fully_funded_balance=row["fully_funded_balance"],
-                    percent_funded=row["percent_funded"],
-                )
-                db.session.add(ReserveYearResult(**kwargs))
-
-            study.recommended_annual_contribution = float(recommended_contrib)
+        ReserveYearResult.query.filter_by(study_id=study.id).delete(synchronize_session=False)
+        study.recommended_annual_contribution = None
+        if has_components:
+            study.projection_status = "pending"
 
         study.paid_status = "paid"
         if tier == "essentials":
@@ -1405,12 +1781,18 @@ def create_app():
         if _audit_enabled_for_study_actor(study, u):
             log_audit(u, "user_checkout_paid", "reserve_study", study.id, meta={
                 "tier": tier,
-                "price_cents": _tier_price_cents(tier),
+                "price_cents": TIER_DISPLAY[tier][0],
                 "workflow_status": study.workflow_status,
             })
 
         db.session.commit()
 
+        # The multi-year simulation can take seconds on large horizons;
+        # build it off-request and let study_detail show the pending state
+        # until the rows land.
+        if has_components:
+            _COMPUTE_EXECUTOR.submit(_build_projection_task, app, study.id)
+
         if tier == "plus":
             flash("Payment successful (simulated). You can review your inputs while our team completes the report.")
         else:
@@ -1473,7 +1855,14 @@ def create_app():
                 pending_body="Your Premium request is in progress. Our team will build and approve your report, then it will appear here automatically.",
             )
 
-        results = ReserveYearResult.query.filter_by(study_id=study_id).order_by(ReserveYearResult.year.asc()).all()
+        # Template needs a real list, but fetch in 200-row batches so a long
+        # horizon doesn't spike peak memory during the read.
+        results = db.session.execute(
+            db.select(ReserveYearResult)
+            .filter_by(study_id=study_id)
+            .order_by(ReserveYearResult.year.asc())
+            .execution_options(yield_per=200)
+        ).scalars().all()
 
         # New: admin CTA availability (templates can show a "Complete & Approve" button)
         admin_can_approve = bool(
@@ -1482,12 +1871,32 @@ def create_app():
             and ws in ("paid_awaiting_review", "paid_pending_admin_build")
         )
 
+        # Paid study with no rows yet: either the background projection is
+        # still running (or queued), or it failed and recorded the marker —
+        # the template shows a refresh hint for the former and an error for
+        # the latter.
+        projection_failed = bool(
+            not results
+            and components
+            and study.is_paid
+            and (study.projection_status or "ready") == "failed"
+        )
+        projection_pending = bool(
+            not results
+            and components
+            and study.is_paid
+            and study.recommended_annual_contribution is None
+            and not projection_failed
+        )
+
         return render_template(
             "study_detail.html",
             study=study,
             results=results,
             components=components,
             comp_photos=comp_photos,
+            projection_pending=projection_pending,
+            projection_failed=projection_failed,
             admin_can_approve=admin_can_approve,
             admin_approve_url=(url_for("admin_approve", study_id=study.id) if admin_can_approve else None),
         )
@@ -1512,49 +1921,82 @@ def create_app():
             flash("Please complete checkout before downloading a report.")
             return redirect(url_for("checkout", study_id=study.id))
 
-        results = ReserveYearResult.query.filter_by(study_id=study_id).order_by(ReserveYearResult.year.asc()).all()
-
-        output = io.StringIO()
-        writer = csv.writer(output)
-        writer.writerow(["property", study.property.name])
-        writer.writerow(["study_id", study.id])
-        writer.writerow(["tier", study.tier])
-        writer.writerow(["workflow_status", study.workflow_status])
-        writer.writerow(["start_year", study.start_year])
-        writer.writerow(["horizon_years", study.horizon_years])
-        writer.writerow(["inflation_rate", study.inflation_rate])
-        writer.writerow(["interest_rate", study.interest_rate])
-        writer.writerow(["starting_balance", f"{study.starting_balance:.2f}"])
-        writer.writerow(["min_balance", f"{study.min_balance:.2f}"])
-        writer.writerow(["funding_method", study.funding_method])
-        writer.writerow(["contribution_mode", study.contribution_mode])
-        writer.writerow(["recommended_annual_contribution", f"{(study.recommended_annual_contribution or 0.0):.2f}"])
-        writer.writerow([])
-
-        writer.writerow(["Components"])
-        writer.writerow(["name", "qty", "useful_life_years", "remaining_life_years", "cycle_years", "replacement_cost_today"])
-        for c in study.components:
-            writer.writerow([c.name, c.quantity, c.useful_life_years, c.remaining_life_years, c.cycle_years, f"{c.current_replacement_cost:.2f}"])
-
-        writer.writerow([])
-        writer.writerow(["Year-by-year results"])
-        writer.writerow(["year", "start", "contrib", "expenses", "interest", "end", "ffb", "percent_funded"])
-
-        for r in results:
-            writer.writerow([
-                r.year,
-                f"{r.starting_balance:.2f}",
-                f"{r.contributions:.2f}",
-                f"{r.expenses:.2f}",
-                f"{r.interest_earned:.2f}",
-                f"{r.ending_balance:.2f}",
-                f"{r.fully_funded_balance:.2f}",
-                f"{r.percent_funded:.6f}",
-            ])
-
-        mem = io.BytesIO(output.getvalue().encode("utf-8"))
+        def generate():
+            line = _CsvLine()
+            writer = csv.writer(line)
+
+            writerow = writer.writerow  # hoisted: skip the method lookup per row
+
+            # Fixed-size metadata block: one response chunk, not 16 tiny ones.
+            yield "".join((
+                writerow(["property", study.property.name]),
+                writerow(["study_id", study.id]),
+                writerow(["tier", study.tier]),
+                writerow(["workflow_status", study.workflow_status]),
+                writerow(["start_year", study.start_year]),
+                writerow(["horizon_years", study.horizon_years]),
+                writerow(["inflation_rate", study.inflation_rate]),
+                writerow(["interest_rate", study.interest_rate]),
+                writerow(["starting_balance", f"{study.starting_balance:.2f}"]),
+                writerow(["min_balance", f"{study.min_balance:.2f}"]),
+                writerow(["funding_method", study.funding_method]),
+                writerow(["contribution_mode", study.contribution_mode]),
+                writerow(["recommended_annual_contribution", f"{(study.recommended_annual_contribution or 0.0):.2f}"]),
+                writerow([]),
+                writerow(["Components"]),
+                writerow(["name", "qty", "useful_life_years", "remaining_life_years", "cycle_years", "replacement_cost_today"]),
+            ))
+            comp_rows = db.session.execute(
+                db.select(
+                    ReserveComponent.name,
+                    ReserveComponent.quantity,
+                    ReserveComponent.useful_life_years,
+                    ReserveComponent.remaining_life_years,
+                    ReserveComponent.cycle_years,
+                    ReserveComponent.current_replacement_cost,
+                ).where(ReserveComponent.study_id == study.id)
+            )
+            for name, qty, ul, rl, cyc, cost in comp_rows:
+                yield writer.writerow([name, qty, ul, rl, cyc, f"{cost:.2f}"])
+
+            yield writer.writerow([])
+            yield writer.writerow(["Year-by-year results"])
+            yield writer.writerow(["year", "start", "contrib", "expenses", "interest", "end", "ffb", "percent_funded"])
+
+            # Plain column tuples: no ORM identity-map/instrumentation cost
+            # per row, fetched in server-side cursor batches.
+            stmt = (
+                db.select(
+                    ReserveYearResult.year,
+                    ReserveYearResult.starting_balance,
+                    ReserveYearResult.contributions,
+                    ReserveYearResult.expenses,
+                    ReserveYearResult.interest_earned,
+                    ReserveYearResult.ending_balance,
+                    ReserveYearResult.fully_funded_balance,
+                    ReserveYearResult.percent_funded,
+                )
+                .where(ReserveYearResult.study_id == study_id)
+                .order_by(ReserveYearResult.year.asc())
+            )
+            for year, start, contrib, expenses, interest, end, ffb, pct in db.session.execute(stmt).yield_per(500):
+                yield writer.writerow([
+                    year,
+                    f"{start:.2f}",
+                    f"{contrib:.2f}",
+                    f"{expenses:.2f}",
+                    f"{interest:.2f}",
+                    f"{end:.2f}",
+                    f"{ffb:.2f}",
+                    f"{pct:.6f}",
+                ])
+
         filename = f"reserve_study_{study.id}_{study.property.name.replace(' ', '_')}.csv"
-        return send_file(mem, mimetype="text/csv", as_attachment=True, download_name=filename)
+        return Response(
+            stream_with_context(generate()),
+            mimetype="text/csv",
+            headers={"Content-Disposition": f"attachment; filename={filename}"},
+        )
 
     return app
 
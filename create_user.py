@@ -1,16 +1,20 @@
 # create_user.py
 import os
+
+# one-shot script: create_app picks a pool that releases the connection
+# immediately instead of parking it in a QueuePool
+os.environ.setdefault("FLASK_SCRIPT", "1")
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from werkzeug.security import generate_password_hash
-from app import create_app
+from app import create_app, PASSWORD_HASH_METHOD
 from models import db, User
 
-def _admin_emails() -> set[str]:
-    raw = (os.getenv("ADMIN_EMAILS") or "").strip()
-    if not raw:
-        return set()
-    # split on comma, normalize lowercase
-    parts = [p.strip().lower() for p in raw.replace(";", ",").split(",")]
-    return {p for p in parts if p}
+# parsed once at import: split on comma/semicolon, normalize lowercase
+ADMIN_EMAILS = frozenset(
+    p.strip().lower()
+    for p in (os.getenv("ADMIN_EMAILS") or "").replace(";", ",").split(",")
+    if p.strip()
+)
 
 email = os.environ.get("NEW_USER_EMAIL")
 password = os.environ.get("NEW_USER_PASSWORD")
@@ -22,24 +26,19 @@ app = create_app()
 
 with app.app_context():
     email_norm = email.strip().lower()
-    admins = _admin_emails()
+    should_admin = email_norm in ADMIN_EMAILS
 
-    existing = User.query.filter_by(email=email_norm).first()
-    if existing:
-        # keep admin status synced with env
-        should_admin = email_norm in admins
-        if hasattr(existing, "is_admin") and bool(getattr(existing, "is_admin", False)) != should_admin:
-            existing.is_admin = should_admin
-            db.session.commit()
-            print("Updated admin flag for:", email_norm, "->", should_admin)
-        else:
-            print("User already exists:", email_norm)
-    else:
-        u = User(
+    # Single UPSERT round trip instead of SELECT-then-INSERT/UPDATE.
+    # Existing users keep their password; only the admin flag is synced.
+    stmt = (
+        pg_insert(User)
+        .values(
             email=email_norm,
-            password_hash=generate_password_hash(password),
-            is_admin=(email_norm in admins),
+            password_hash=generate_password_hash(password, method=PASSWORD_HASH_METHOD),
+            is_admin=should_admin,
         )
-        db.session.add(u)
-        db.session.commit()
-        print("Created user:", email_norm, "admin=" + str(u.is_admin))
+        .on_conflict_do_update(index_elements=["email"], set_={"is_admin": should_admin})
+    )
+    db.session.execute(stmt)
+    db.session.commit()
+    print("Upserted user:", email_norm, "admin=" + str(should_admin))
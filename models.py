@@ -63,6 +63,11 @@ class Property(db.Model):
         "ReserveStudy", backref="property", lazy=True, cascade="all, delete-orphan"
     )
 
+    __table_args__ = (
+        # single index seek for the owner-scoped (id, user_id) access check
+        db.Index("ix_properties_user_id_id", "user_id", "id"),
+    )
+
 
 class ReserveStudy(db.Model):
     __tablename__ = "reserve_studies"
@@ -98,13 +103,19 @@ class ReserveStudy(db.Model):
 
     recommended_annual_contribution = db.Column(db.Float, nullable=True)
 
+    # pending | ready | failed — the projection simulation runs in the
+    # background after checkout, same lifecycle as the photo uploads
+    projection_status = db.Column(db.String(20), nullable=False, default="ready")
+
     # legacy: keep for compatibility
     paid_status = db.Column(db.String(30), nullable=False, default="draft", index=True)
 
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
 
+    # selectin: one batched IN-query per load instead of a lazy SELECT per
+    # study when handlers touch .components
     components = db.relationship(
-        "ReserveComponent", backref="study", lazy=True, cascade="all, delete-orphan"
+        "ReserveComponent", backref="study", lazy="selectin", cascade="all, delete-orphan"
     )
     results = db.relationship(
         "ReserveYearResult", backref="study", lazy=True, cascade="all, delete-orphan"
@@ -151,8 +162,10 @@ class ReserveYearResult(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
 
+    # no standalone index: ix_ryr_study_year leads with study_id, so it
+    # serves the study-scoped lookups and we skip the extra index write
     study_id = db.Column(
-        db.Integer, db.ForeignKey("reserve_studies.id"), nullable=False, index=True
+        db.Integer, db.ForeignKey("reserve_studies.id"), nullable=False
     )
 
     year = db.Column(db.Integer, nullable=False)
@@ -168,6 +181,33 @@ class ReserveYearResult(db.Model):
 
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
 
+    __table_args__ = (
+        # matches the filter+order of the detail and CSV reads, so no sort step
+        db.Index("ix_ryr_study_year", "study_id", "year"),
+    )
+
+    # simulation output fields persisted per year
+    _BULK_FIELDS = (
+        "year",
+        "starting_balance",
+        "contributions",
+        "expenses",
+        "interest_earned",
+        "ending_balance",
+        "fully_funded_balance",
+        "percent_funded",
+    )
+
+    @classmethod
+    def bulk_create(cls, study_id: int, rows) -> None:
+        """Insert simulation rows (reserve_math.YearResult) as one
+        multi-row statement — no ORM instances, no identity-map
+        bookkeeping. The caller commits."""
+        db.session.bulk_insert_mappings(
+            cls,
+            [{"study_id": study_id, **{f: getattr(row, f) for f in cls._BULK_FIELDS}} for row in rows],
+        )
+
 
 class ComponentPhoto(db.Model):
     __tablename__ = "component_photos"
@@ -176,7 +216,7 @@ class ComponentPhoto(db.Model):
 
     component_id = db.Column(
         db.Integer,
-        db.ForeignKey("reserve_components.id"),
+        db.ForeignKey("reserve_components.id", ondelete="CASCADE"),
         nullable=False,
         index=True,
     )
@@ -185,14 +225,25 @@ class ComponentPhoto(db.Model):
     storage_bucket = db.Column(db.String(255), nullable=True)
     storage_key = db.Column(db.String(600), nullable=False, index=True)
 
-    original_filename = db.Column(db.String(255), nullable=True)
+    # deferred: legacy fallback / bookkeeping fields that listings never
+    # need — loaded on first attribute access only. storage_key stays hot
+    # because every photo read presigns it.
+    original_filename = db.deferred(db.Column(db.String(255), nullable=True))
     filename = db.Column(db.String(255), nullable=True)
 
     content_type = db.Column(db.String(120), nullable=True)
-    size_bytes = db.Column(db.Integer, nullable=True)
+    size_bytes = db.deferred(db.Column(db.Integer, nullable=True))
+
+    # pending | ready | failed — S3 PUT happens in the background
+    upload_status = db.Column(db.String(20), nullable=False, default="ready")
 
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
 
+    __table_args__ = (
+        # matches the filter+order of the photo listings, so no sort step
+        db.Index("ix_cp_component_created", "component_id", "created_at"),
+    )
+
 
 class TempComponentPhoto(db.Model):
     __tablename__ = "temp_component_photos"
@@ -208,6 +259,9 @@ class TempComponentPhoto(db.Model):
     filename = db.Column(db.String(255), nullable=True)
     content_type = db.Column(db.String(120), nullable=True)
 
+    # pending | ready | failed — S3 PUT happens in the background
+    upload_status = db.Column(db.String(20), nullable=False, default="ready")
+
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
 
     __table_args__ = (
@@ -1,14 +1,32 @@
-import base64
+import asyncio
+import hashlib
 import json
 import os
 from typing import Any, Dict, List
 
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
+
+from storage import presign_get_urls_batch
 
 # -------------------------------------------------
 # Client
 # -------------------------------------------------
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# Built lazily so workers that never touch vision skip the HTTP pool /
+# TLS context setup at import time.
+_client: OpenAI | None = None
+_async_client: AsyncOpenAI | None = None
+
+def _get_client() -> OpenAI:
+    global _client
+    if _client is None:
+        _client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    return _client
+
+def _get_async_client() -> AsyncOpenAI:
+    global _async_client
+    if _async_client is None:
+        _async_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    return _async_client
 
 # -------------------------------------------------
 # Environment-backed configuration
@@ -76,9 +94,28 @@ Guidelines:
 # -------------------------------------------------
 # Helpers
 # -------------------------------------------------
-def _b64_data_url(image_bytes: bytes, mime: str) -> str:
-    b64 = base64.b64encode(image_bytes).decode("utf-8")
-    return f"data:{mime};base64,{b64}"
+# how long a presigned image URL must stay fetchable by OpenAI
+_PRESIGN_TTL_SECONDS = 300
+
+# content-hash -> uploaded file id, so re-analyzing the same photo never
+# re-uploads the bytes
+_FILE_ID_CACHE_MAX = 512
+_file_id_cache: Dict[str, str] = {}
+
+def _file_id_for_bytes(image_bytes: bytes, mime: str, name: str) -> str:
+    """Upload raw image bytes once via the Files API and reuse the file id
+    on later calls — multipart raw bytes, no base64 inflation."""
+    digest = hashlib.sha256(image_bytes).hexdigest()
+    file_id = _file_id_cache.get(digest)
+    if file_id is None:
+        file_id = _get_client().files.create(
+            file=(name or "photo", image_bytes, mime),
+            purpose="vision",
+        ).id
+        if len(_file_id_cache) >= _FILE_ID_CACHE_MAX:
+            _file_id_cache.clear()
+        _file_id_cache[digest] = file_id
+    return file_id
 
 def _extract_output_text(resp: Any) -> str:
     """
@@ -104,6 +141,9 @@ def _extract_output_text(resp: Any) -> str:
 
     raise RuntimeError("OpenAI response did not contain text output")
 
+# one decoder instance, reused across salvage parses
+_JSON_DECODER = json.JSONDecoder()
+
 def _safe_json_parse(text: str) -> Dict[str, Any]:
     """
     Attempts strict JSON parse, then falls back to trimming noise.
@@ -112,28 +152,27 @@ def _safe_json_parse(text: str) -> Dict[str, Any]:
         return json.loads(text)
     except json.JSONDecodeError:
         start = text.find("{")
-        end = text.rfind("}")
-        if start == -1 or end == -1:
+        if start == -1:
             raise
-        return json.loads(text[start : end + 1])
+        # raw_decode parses the object in place and tolerates trailing
+        # noise — no rfind scan and no sliced copy of the payload.
+        data, _ = _JSON_DECODER.raw_decode(text, start)
+        return data
 
 # -------------------------------------------------
 # Main entry point
 # -------------------------------------------------
-def suggest_components_from_images(
+def _build_content(
     images: List[Dict[str, Any]],
-    address_context: str = "",
-    property_type_context: str = "",
-) -> Dict[str, Any]:
-    """
-    images: list of {"bytes": b"...", "mime": "image/jpeg", "label": "Photo 1"}
-    """
-
+    address_context: str,
+    property_type_context: str,
+) -> List[Dict[str, Any]]:
+    # Only the short variable context lives in the user turn; the static
+    # rules block goes out via instructions= so it is never rebuilt here.
     content: List[Dict[str, Any]] = [
         {
             "type": "input_text",
             "text": (
-                f"{SYSTEM_PROMPT}\n\n"
                 f"Context:\n"
                 f"- Address/Location: {address_context or 'Unknown'}\n"
                 f"- Property type: {property_type_context or 'Unknown'}\n\n"
@@ -142,20 +181,30 @@ def suggest_components_from_images(
         }
     ]
 
-    for img in images[:DEFAULT_MAX_IMAGES]:
-        content.append(
-            {
-                "type": "input_image",
-                "image_url": _b64_data_url(img["bytes"], img["mime"]),
-                "detail": DEFAULT_DETAIL,
-            }
-        )
+    imgs = images[:DEFAULT_MAX_IMAGES]
 
-    resp = client.responses.create(
-        model=DEFAULT_MODEL,
-        input=[{"role": "user", "content": content}],
+    # Photos already in storage go by presigned URL reference: skips the
+    # base64 encode and the ~33% request-body inflation of a data URL.
+    urls = presign_get_urls_batch(
+        [img.get("storage_key") or "" for img in imgs],
+        expires_seconds=_PRESIGN_TTL_SECONDS,
     )
 
+    for img, url in zip(imgs, urls):
+        item: Dict[str, Any] = {"type": "input_image", "detail": DEFAULT_DETAIL}
+        if url:
+            item["image_url"] = url
+        else:
+            # raw-bytes fallback: multipart Files upload, cached per
+            # content hash — no base64 encode, no 33% body inflation
+            item["file_id"] = _file_id_for_bytes(
+                img["bytes"], img["mime"], img.get("label") or "photo"
+            )
+        content.append(item)
+
+    return content
+
+def _normalize_payload(resp: Any) -> Dict[str, Any]:
     text = _extract_output_text(resp)
     data = _safe_json_parse(text)
 
@@ -174,3 +223,64 @@ def suggest_components_from_images(
 
     return data
 
+def suggest_components_from_images(
+    images: List[Dict[str, Any]],
+    address_context: str = "",
+    property_type_context: str = "",
+) -> Dict[str, Any]:
+    """
+    images: list of {"bytes": b"...", "mime": "image/jpeg", "label": "Photo 1"}
+    or {"storage_key": "...", "label": "Photo 1"} for photos already in R2.
+    """
+    content = _build_content(images, address_context, property_type_context)
+
+    resp = _get_client().responses.create(
+        model=DEFAULT_MODEL,
+        instructions=SYSTEM_PROMPT,
+        input=[{"role": "user", "content": content}],
+    )
+
+    return _normalize_payload(resp)
+
+async def suggest_components_from_images_async(
+    images: List[Dict[str, Any]],
+    address_context: str = "",
+    property_type_context: str = "",
+) -> Dict[str, Any]:
+    """
+    Async twin of suggest_components_from_images, for callers that fan out
+    several analyses: the round trips overlap instead of queueing.
+    """
+    content = _build_content(images, address_context, property_type_context)
+
+    resp = await _get_async_client().responses.create(
+        model=DEFAULT_MODEL,
+        instructions=SYSTEM_PROMPT,
+        input=[{"role": "user", "content": content}],
+    )
+
+    return _normalize_payload(resp)
+
+def suggest_components_for_batches(
+    batches: List[Dict[str, Any]],
+) -> List[Dict[str, Any]]:
+    """
+    Analyze several image batches concurrently. Each batch is
+    {"images": [...], "address_context": "", "property_type_context": ""}.
+    Results come back in input order.
+    """
+
+    async def _run():
+        return await asyncio.gather(
+            *[
+                suggest_components_from_images_async(
+                    b["images"],
+                    b.get("address_context", ""),
+                    b.get("property_type_context", ""),
+                )
+                for b in batches
+            ]
+        )
+
+    return asyncio.run(_run())
+
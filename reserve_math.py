@@ -1,13 +1,38 @@
 # reserve_math.py
 from __future__ import annotations
+import hashlib
+from dataclasses import dataclass, replace
 from typing import Dict, List, Tuple
 
 
-def _build_component_state(components: List[dict]) -> List[dict]:
+@dataclass(slots=True)
+class YearResult:
+    """One simulated year. Slots: fixed fields, ~60% less memory than the
+    dict rows this replaces, and faster attribute access in the loops."""
+
+    year: int
+    starting_balance: float
+    recommended_contribution: float
+    contributions: float
+    expenses: float
+    interest_earned: float
+    ending_balance: float
+    fully_funded_balance: float
+    percent_funded: float
+
+
+def _build_component_state(
+    components: List[dict],
+) -> Tuple[List[float], List[float], List[float]]:
     """
-    Normalize component fields + create per-component state for simulation.
+    Normalize component fields into the struct-of-arrays state the kernel
+    consumes: parallel (qty_costs, cycles, ages) float lists, one entry per
+    component. Built directly — no intermediate per-component dicts to
+    allocate and re-extract.
     """
-    st = []
+    qty_costs: List[float] = []
+    cycles: List[float] = []
+    ages: List[float] = []
     for c in components:
         qty = int(c.get("quantity", 1) or 1)
         ul = int(c["useful_life_years"])
@@ -18,110 +43,235 @@ def _build_component_state(components: List[dict]) -> List[dict]:
         ul = max(1, ul)
         cyc = max(1, cyc)
         rl = max(0, rl)
+        qty = max(1, qty)
 
         # infer "age" within cycle: age = cycle - remaining (clamped)
         age = max(0, min(cyc, cyc - rl))
 
-        st.append(
-            {
-                "name": c["name"],
-                "qty": max(1, qty),
-                "cycle": cyc,
-                "age": age,
-                "cost_today": cost,
-            }
-        )
-    return st
+        # qty * cost is invariant across the simulation; compute once here
+        # instead of twice per component per simulated year
+        qty_costs.append(qty * cost)
+        cycles.append(float(cyc))
+        ages.append(float(age))
+    return qty_costs, cycles, ages
 
 
-def _simulate(
-    *,
-    start_year: int,
+def _inflation_factors(horizon_years: int, infl_rate: float) -> List[float]:
+    """(1+r)**i for each year of the horizon, built once per search so the
+    ~17 simulate calls of a recommendation share one table. Accumulated by
+    running multiplication — one fmul per year instead of a pow call."""
+    factors: List[float] = []
+    factor = 1.0
+    one_plus_r = 1.0 + infl_rate
+    for _ in range(horizon_years):
+        factors.append(factor)
+        factor *= one_plus_r
+    return factors
+
+
+def _simulate_core(
     horizon_years: int,
-    inflation_rate: float,
-    interest_rate: float,
+    infl_rate: float,
+    intr_rate: float,
     starting_balance: float,
-    annual_contribution: float,
-    components: List[dict],
-    min_balance: float,
-) -> Tuple[bool, List[Dict]]:
+    contrib: float,
+    min_bal: float,
+    qty_costs: List[float],
+    cycles: List[float],
+    ages: List[float],
+    infl_factors: List[float],
+    collect: bool,
+    stop_on_fail: bool = True,
+) -> Tuple[bool, List[Tuple[float, float, float, float, float]]]:
     """
-    Simulate year-by-year:
-      - Levelized annual contribution
-      - Expenses from scheduled replacements (cycle-based)
-      - Fully Funded Balance (FFB) = sum(component_cost_in_year * %deterioration)
-      - Enforce: ending_balance >= min_balance and >= FFB (full funding target)
-    Returns: (passes_constraints, yearly_rows)
+    Numeric kernel of the simulation: scalars and flat float lists in,
+    (ok, per-year (start, expenses, interest, end, ffb) tuples) out.
+    Mutates ages in place. Kept free of dicts and model objects so it
+    stays a pure tight loop. stop_on_fail=False runs the full horizon
+    even through failing years (used to measure shortfalls).
     """
-    st = _build_component_state(components)
-
-    bal = float(starting_balance)
-    rows: List[Dict] = []
+    all_ok = True
+    n_comp = len(qty_costs)
+
+    bal = starting_balance
+    yearly: List[Tuple[float, float, float, float, float]] = []
+    yearly_append = yearly.append  # bound once; skip the lookup per year
+
+    # Probe mode only: once the balance clears the worst case for every
+    # remaining year — all components replaced every year at final-year
+    # inflation, against the largest possible FFB — the outcome is decided
+    # and the rest of the horizon can be skipped. Only sound when both
+    # rates are non-negative.
+    can_prune = (not collect) and infl_rate >= 0.0 and intr_rate >= 0.0
+    worst_ffb = 0.0
+    if can_prune and horizon_years > 0:
+        total_qc = 0.0
+        for j in range(n_comp):
+            total_qc += qty_costs[j]
+        worst_ffb = total_qc * infl_factors[horizon_years - 1]
+
+    last_year = horizon_years - 1
 
     for i in range(horizon_years):
-        year = start_year + i
-
-        # inflation factor relative to year 0
-        infl = (1.0 + float(inflation_rate)) ** i
-
-        # Compute Fully Funded Balance (FFB) for this year
-        # % deterioration approximated as age/cycle
-        ffb = 0.0
-        for c in st:
-            pct = max(0.0, min(1.0, c["age"] / float(c["cycle"])))
-            ffb += (c["qty"] * c["cost_today"] * infl) * pct
+        # inflation factor relative to year 0, shared across simulate calls
+        infl = infl_factors[i]
 
         start_bal = bal
-        interest = start_bal * float(interest_rate)
+        interest = start_bal * intr_rate
 
-        # Expenses: replace any component when age reaches cycle
+        # One fused pass per year: FFB accumulation (% deterioration
+        # approximated as age/cycle), replacement expense, and the age
+        # advance each touch a component's state exactly once.
+        ffb = 0.0
         expenses = 0.0
-        for c in st:
-            # if it will hit replacement this year, expense at inflated cost
-            if c["age"] >= c["cycle"]:
-                expenses += c["qty"] * c["cost_today"] * infl
-                # reset after replacement
-                c["age"] = 0
-
-        contrib = float(annual_contribution)
+        for j in range(n_comp):
+            qc = qty_costs[j] * infl
+            cyc = cycles[j]
+            age = ages[j]
+            pct = age / cyc
+            if pct > 1.0:
+                pct = 1.0
+            ffb += qc * pct
+            if age >= cyc:
+                # replacement hits this year at inflated cost; reset
+                expenses += qc
+                age = 0.0
+            ages[j] = age + 1.0
+
         end_bal = start_bal + contrib + interest - expenses
 
         # constraints
-        if end_bal < float(min_balance) - 1e-9:
+        if end_bal < min_bal - 1e-9:
             ok = False
         elif end_bal < ffb - 1e-9:
             ok = False
         else:
             ok = True
 
-        pct_funded = 0.0
-        if ffb > 0:
-            pct_funded = max(0.0, end_bal / ffb)
-
-        rows.append(
-            {
-                "year": year,
-                "starting_balance": start_bal,
-                "recommended_contribution": annual_contribution,
-                "contributions": contrib,
-                "expenses": expenses,
-                "interest_earned": interest,
-                "ending_balance": end_bal,
-                "fully_funded_balance": ffb,
-                "percent_funded": pct_funded,
-            }
-        )
-
-        # advance component ages to next year
-        for c in st:
-            c["age"] += 1
+        if collect:
+            yearly_append((start_bal, expenses, interest, end_bal, ffb))
+        elif can_prune and ok:
+            floor = worst_ffb if worst_ffb > min_bal else min_bal
+            if end_bal - worst_ffb * (last_year - i) >= floor:
+                return all_ok, yearly
 
         bal = end_bal
 
         if not ok:
-            return False, rows
+            if stop_on_fail:
+                return False, yearly
+            all_ok = False
 
-    return True, rows
+    return all_ok, yearly
+
+
+def _simulate(
+    *,
+    start_year: int,
+    horizon_years: int,
+    inflation_rate: float,
+    interest_rate: float,
+    starting_balance: float,
+    annual_contribution: float,
+    components: List[dict],
+    min_balance: float,
+    collect_rows: bool = True,
+    stop_on_fail: bool = True,
+    infl_factors: List[float] | None = None,
+    state: Tuple[List[float], List[float], List[float]] | None = None,
+) -> Tuple[bool, List[YearResult]]:
+    """
+    Simulate year-by-year:
+      - Levelized annual contribution
+      - Expenses from scheduled replacements (cycle-based)
+      - Fully Funded Balance (FFB) = sum(component_cost_in_year * %deterioration)
+      - Enforce: ending_balance >= min_balance and >= FFB (full funding target)
+    Returns: (passes_constraints, yearly_rows)
+
+    collect_rows=False skips building the per-year rows — search probes
+    only need the pass/fail flag, not display rows.
+
+    state lets a caller that simulates the same components repeatedly
+    (the recommendation search) normalize them once and share the result;
+    only a copy of the ages list is handed to the kernel, since that is
+    the one array it mutates.
+    """
+    if state is None:
+        # fresh lists from _build_component_state — safe to hand over
+        qty_costs, cycles, ages = _build_component_state(components)
+    else:
+        qty_costs, cycles, ages0 = state
+        ages = list(ages0)
+
+    contrib = float(annual_contribution)
+
+    if infl_factors is None:
+        infl_factors = _inflation_factors(horizon_years, float(inflation_rate))
+
+    ok, yearly = _simulate_core(
+        horizon_years,
+        float(inflation_rate),
+        float(interest_rate),
+        float(starting_balance),
+        contrib,
+        float(min_balance),
+        qty_costs,
+        cycles,
+        ages,
+        infl_factors,
+        collect_rows,
+        stop_on_fail,
+    )
+
+    if not collect_rows:
+        return ok, []
+
+    rows = [
+        YearResult(
+            year=start_year + i,
+            starting_balance=start_bal,
+            recommended_contribution=annual_contribution,
+            contributions=contrib,
+            expenses=expenses,
+            interest_earned=interest,
+            ending_balance=end_bal,
+            fully_funded_balance=ffb,
+            percent_funded=(max(0.0, end_bal / ffb) if ffb > 0 else 0.0),
+        )
+        for i, (start_bal, expenses, interest, end_bal, ffb) in enumerate(yearly)
+    ]
+    return ok, rows
+
+
+# In-process memo for the recommendation: the output is a deterministic
+# function of its inputs, so re-running the same study (dashboard
+# re-renders, repeated checkouts) can skip the whole search. Keys are
+# digests of the inputs, so any edit to the study or its components
+# naturally misses. Cleared wholesale when full, like the presign cache.
+_RESULTS_CACHE_MAX = 256
+_results_cache: Dict[str, Tuple[float, List[YearResult]]] = {}
+
+
+def _inputs_digest(
+    start_year, horizon_years, inflation_rate, interest_rate,
+    starting_balance, min_balance, components,
+) -> str:
+    comp_key = sorted(
+        (
+            c["name"],
+            c.get("quantity", 1),
+            c["useful_life_years"],
+            c["remaining_life_years"],
+            c.get("cycle_years"),
+            c["current_replacement_cost"],
+        )
+        for c in components
+    )
+    raw = repr((
+        start_year, horizon_years, inflation_rate, interest_rate,
+        starting_balance, min_balance, comp_key,
+    ))
+    return hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
 
 
 def recommend_levelized_full_funding_contribution(
@@ -133,61 +283,167 @@ def recommend_levelized_full_funding_contribution(
     starting_balance: float,
     components: List[dict],
     min_balance: float = 0.0,
-) -> Tuple[float, List[Dict]]:
+) -> Tuple[float, List[YearResult]]:
     """
     Find the smallest annual contribution that satisfies full-funding constraints:
       - ending balance >= min_balance
       - ending balance >= fully funded balance (FFB) each year
 
-    Uses binary search.
+    Ending balances are linear in the contribution (expenses and FFB don't
+    depend on it), so one zero-contribution pass gives the exact minimum in
+    closed form; a short bisection around it only absorbs float drift.
     """
-    # quick lower bound
-    lo = 0.0
-
-    # upper bound: something safely high based on total inflated replacement
-    # (not perfect, but avoids “no solution” due to too-low hi)
-    base_total = sum(float(c["current_replacement_cost"]) * int(c.get("quantity", 1) or 1) for c in components)
-    hi = max(5000.0, base_total)  # start here
-    hi *= 2.0
-
-    # expand hi until it passes (or we hit a hard cap)
-    for _ in range(20):
-        ok, _rows = _simulate(
+    if horizon_years <= 0:
+        return 0.0, []
+
+    cache_key = _inputs_digest(
+        start_year, horizon_years, inflation_rate, interest_rate,
+        starting_balance, min_balance, components,
+    )
+    hit = _results_cache.get(cache_key)
+    if hit is not None:
+        best, best_rows = hit
+        return best, [replace(r) for r in best_rows]
+
+    infl_factors = _inflation_factors(horizon_years, float(inflation_rate))
+
+    # Normalize the components once for the whole search; every simulate
+    # call below shares it and copies only the mutable ages list.
+    state = _build_component_state(components)
+
+    if not components:
+        # No components: no expenses and a zero FFB target, so the only
+        # constraint is the minimum balance and ending balances are
+        # start*(1+r)^(i+1) + C*a_i — solve the binding year directly
+        # instead of running the search.
+        one_plus_r = 1.0 + float(interest_rate)
+        min_bal = float(min_balance)
+        bal = float(starting_balance)
+        a_i = 0.0
+        c0 = 0.0
+        for _ in range(horizon_years):
+            bal *= one_plus_r
+            a_i = a_i * one_plus_r + 1.0
+            shortfall = min_bal - bal
+            if shortfall > 0.0 and shortfall / a_i > c0:
+                c0 = shortfall / a_i
+        best = round(c0, 2)
+        _ok, best_rows = _simulate(
             start_year=start_year,
             horizon_years=horizon_years,
             inflation_rate=inflation_rate,
             interest_rate=interest_rate,
             starting_balance=starting_balance,
-            annual_contribution=hi,
+            annual_contribution=best,
             components=components,
             min_balance=min_balance,
+            stop_on_fail=False,
+            infl_factors=infl_factors,
+            state=state,
         )
-        if ok:
-            break
-        hi *= 2.0
-
-    # binary search
-    best = hi
-    best_rows: List[Dict] = []
-
-    for _ in range(50):
-        mid = (lo + hi) / 2.0
-        ok, rows = _simulate(
+        for r in best_rows:
+            r.recommended_contribution = best
+        if len(_results_cache) >= _RESULTS_CACHE_MAX:
+            _results_cache.clear()
+        _results_cache[cache_key] = (best, best_rows)
+        return best, [replace(r) for r in best_rows]
+
+    # Base pass at zero contribution, full horizon (no early exit): each
+    # year's shortfall against the binding constraint is what a levelized
+    # contribution has to cover.
+    ok0, base_rows = _simulate(
+        start_year=start_year,
+        horizon_years=horizon_years,
+        inflation_rate=inflation_rate,
+        interest_rate=interest_rate,
+        starting_balance=starting_balance,
+        annual_contribution=0.0,
+        components=components,
+        min_balance=min_balance,
+        stop_on_fail=False,
+        infl_factors=infl_factors,
+        state=state,
+    )
+
+    if ok0:
+        # fully funded without contributing anything
+        best = 0.0
+        best_rows = base_rows
+    else:
+        # A contribution C raises year i's ending balance by C * a_i with
+        # a_i = sum_{k<=i} (1+r)^k, so the minimum feasible C is
+        # max_i shortfall_i / a_i — exact, since nothing else depends on C.
+        one_plus_r = 1.0 + float(interest_rate)
+        min_bal = float(min_balance)
+        a_i = 0.0
+        c0 = 0.0
+        for r in base_rows:
+            a_i = a_i * one_plus_r + 1.0
+            shortfall = max(min_bal, r.fully_funded_balance) - r.ending_balance
+            if shortfall > 0.0 and shortfall / a_i > c0:
+                c0 = shortfall / a_i
+
+        # Verify a hair above c0 and bisect the sub-cent bracket to absorb
+        # float drift; widen the margin only if drift actually bites.
+        # Probes only need the pass/fail flag — display rows are built in
+        # one final pass at the winning contribution.
+        margin = 0.01
+        hi = c0 + margin
+        for _ in range(20):
+            ok, _rows = _simulate(
+                start_year=start_year,
+                horizon_years=horizon_years,
+                inflation_rate=inflation_rate,
+                interest_rate=interest_rate,
+                starting_balance=starting_balance,
+                annual_contribution=hi,
+                components=components,
+                min_balance=min_balance,
+                collect_rows=False,
+                infl_factors=infl_factors,
+                state=state,
+            )
+            if ok:
+                break
+            margin *= 2.0
+            hi = c0 + margin
+
+        best = hi
+        lo = max(0.0, c0 - 0.01)
+
+        for _ in range(15):
+            mid = (lo + hi) / 2.0
+            ok, _rows = _simulate(
+                start_year=start_year,
+                horizon_years=horizon_years,
+                inflation_rate=inflation_rate,
+                interest_rate=interest_rate,
+                starting_balance=starting_balance,
+                annual_contribution=mid,
+                components=components,
+                min_balance=min_balance,
+                collect_rows=False,
+                infl_factors=infl_factors,
+                state=state,
+            )
+            if ok:
+                best = mid
+                hi = mid
+            else:
+                lo = mid
+
+        _ok, best_rows = _simulate(
             start_year=start_year,
             horizon_years=horizon_years,
             inflation_rate=inflation_rate,
             interest_rate=interest_rate,
             starting_balance=starting_balance,
-            annual_contribution=mid,
+            annual_contribution=best,
             components=components,
             min_balance=min_balance,
+            infl_factors=infl_factors,
+            state=state,
         )
-        if ok:
-            best = mid
-            best_rows = rows
-            hi = mid
-        else:
-            lo = mid
 
     # round to cents for display/storage
     best = round(best, 2)
@@ -195,9 +451,14 @@ def recommend_levelized_full_funding_contribution(
     # update recommended_contribution in rows to match rounded best
     if best_rows:
         for r in best_rows:
-            r["recommended_contribution"] = best
+            r.recommended_contribution = best
+
+    if len(_results_cache) >= _RESULTS_CACHE_MAX:
+        _results_cache.clear()
+    _results_cache[cache_key] = (best, best_rows)
 
-    return best, best_rows
+    # callers get their own row copies so cached entries stay pristine
+    return best, [replace(r) for r in best_rows]
 
 
 
@@ -1,9 +1,14 @@
 # storage.py
 import os
-import uuid
+import re
+import threading
+import time
 from typing import Optional
 
+from io import BytesIO
+
 import boto3
+from boto3.s3.transfer import TransferConfig
 from botocore.client import Config
 
 R2_ACCOUNT_ID = (os.getenv("R2_ACCOUNT_ID") or "").strip()
@@ -19,41 +24,92 @@ def _endpoint() -> str:
     return f"https://{R2_ACCOUNT_ID}.r2.cloudflarestorage.com"
 
 
+# One client per process: S3 clients are thread-safe, and construction
+# (service model parse, endpoint resolution, signer setup) costs tens of
+# ms — pure overhead when paid per call. The session and config are built
+# once at import; max_pool_connections raises the HTTP pool above the
+# default of 10 so concurrent uploads/presigns don't queue on sockets.
+_SESSION = boto3.session.Session()
+_CFG = Config(
+    signature_version="s3v4",
+    retries={"mode": "standard", "max_attempts": 3},
+    max_pool_connections=50,
+)
+_CLIENT = None
+_CLIENT_LOCK = threading.Lock()
+
+
 def _client():
-    missing = []
-    for k in ["R2_ACCOUNT_ID", "R2_ACCESS_KEY_ID", "R2_SECRET_ACCESS_KEY", "R2_BUCKET"]:
-        if not os.getenv(k):
-            missing.append(k)
-    if missing:
-        raise RuntimeError(f"Missing R2 env vars: {', '.join(missing)}")
-
-    return boto3.client(
-        "s3",
-        endpoint_url=_endpoint(),
-        aws_access_key_id=R2_ACCESS_KEY_ID,
-        aws_secret_access_key=R2_SECRET_ACCESS_KEY,
-        region_name=R2_REGION or "auto",
-        config=Config(signature_version="s3v4"),
-    )
+    global _CLIENT
+    if _CLIENT is None:
+        with _CLIENT_LOCK:
+            if _CLIENT is None:
+                missing = []
+                for k in ["R2_ACCOUNT_ID", "R2_ACCESS_KEY_ID", "R2_SECRET_ACCESS_KEY", "R2_BUCKET"]:
+                    if not os.getenv(k):
+                        missing.append(k)
+                if missing:
+                    raise RuntimeError(f"Missing R2 env vars: {', '.join(missing)}")
+
+                _CLIENT = _SESSION.client(
+                    "s3",
+                    endpoint_url=_endpoint(),
+                    aws_access_key_id=R2_ACCESS_KEY_ID,
+                    aws_secret_access_key=R2_SECRET_ACCESS_KEY,
+                    region_name=R2_REGION or "auto",
+                    config=_CFG,
+                )
+    return _CLIENT
+
+
+# collapses any run of dots to one, compiled once — the pairwise
+# .replace("..", ".") it replaces left ".." behind for runs of 4+ dots
+# and allocated an extra intermediate string per part
+_DOT_RUN_RE = re.compile(r"\.\.+")
 
 
 def make_storage_key(*parts: str, filename: Optional[str] = None) -> str:
-    clean_parts = [p.strip("/").replace("..", ".") for p in parts if p]
-    base = "/".join(clean_parts)
-    suffix = uuid.uuid4().hex
+    base = "/".join(_DOT_RUN_RE.sub(".", p.strip("/")) for p in parts if p)
+    # same 128 bits of randomness as uuid4().hex without the UUID object
+    # construction and dash-stripped formatting on the way
+    suffix = os.urandom(16).hex()
     if filename:
         fn = filename.strip().replace("/", "_")
         return f"{base}/{suffix}_{fn}"
     return f"{base}/{suffix}"
 
 
+# Shared transfer tuning: bodies under 8MB go out as one PUT (no change
+# for typical photos), larger ones upload as concurrent 8MB parts.
+_TRANSFER_CFG = TransferConfig(
+    multipart_threshold=8 << 20,
+    multipart_chunksize=8 << 20,
+    max_concurrency=8,
+    use_threads=True,
+)
+
+
 def put_object_bytes(storage_key: str, data: bytes, content_type: str) -> None:
     s3 = _client()
-    s3.put_object(
-        Bucket=R2_BUCKET,
-        Key=storage_key,
-        Body=data,
-        ContentType=content_type or "application/octet-stream",
+    s3.upload_fileobj(
+        BytesIO(data),
+        R2_BUCKET,
+        storage_key,
+        ExtraArgs={"ContentType": content_type or "application/octet-stream"},
+        Config=_TRANSFER_CFG,
+    )
+
+
+def put_object_fileobj(storage_key: str, fileobj, content_type: str) -> None:
+    """Stream a file-like object to storage; boto3 chunks (and multiparts
+    large bodies) instead of requiring the whole object in memory."""
+    s3 = _client()
+    s3.upload_fileobj(
+        fileobj,
+        R2_BUCKET,
+        storage_key,
+        ExtraArgs={"ContentType": content_type or "application/octet-stream"},
+        Config=_TRANSFER_CFG,
     )
 
 
@@ -64,14 +120,95 @@ def delete_object(storage_key: str) -> None:
     s3.delete_object(Bucket=R2_BUCKET, Key=storage_key)
 
 
+def delete_objects_bulk(storage_keys) -> None:
+    """Delete many keys with batched DeleteObjects calls (1000 per
+    request, the S3 limit) instead of one round trip per key."""
+    keys = [k for k in storage_keys if k]
+    if not keys:
+        return
+    s3 = _client()
+    for i in range(0, len(keys), 1000):
+        s3.delete_objects(
+            Bucket=R2_BUCKET,
+            Delete={
+                "Objects": [{"Key": k} for k in keys[i : i + 1000]],
+                "Quiet": True,
+            },
+        )
+
+
+# In-process presign cache: repeat page views reuse the same signed URL
+# (and so can the browser cache) instead of re-running HMAC work per view.
+# URLs are re-signed once less than _PRESIGN_MIN_TTL of life remains, so a
+# returned URL is always usable for at least that long.
+_PRESIGN_MIN_TTL_SECONDS = 300
+_PRESIGN_CACHE_MAX = 10000
+_presign_cache: dict = {}  # (storage_key, expires_seconds) -> (url, signed_at)
+
+
+def _presign_cache_get(storage_key: str, expires: int) -> Optional[str]:
+    hit = _presign_cache.get((storage_key, expires))
+    if not hit:
+        return None
+    url, signed_at = hit
+    if (signed_at + expires) - time.time() < _PRESIGN_MIN_TTL_SECONDS:
+        return None
+    return url
+
+
+def _presign_cache_put(storage_key: str, expires: int, url: str) -> None:
+    if len(_presign_cache) >= _PRESIGN_CACHE_MAX:
+        _presign_cache.clear()
+    _presign_cache[(storage_key, expires)] = (url, time.time())
+
+
 def presign_get_url(storage_key: str, expires_seconds: int = 900) -> str:
     if not storage_key:
         return ""
+    expires = max(60, int(expires_seconds or 900))
+    cached = _presign_cache_get(storage_key, expires)
+    if cached is not None:
+        return cached
     s3 = _client()
-    return s3.generate_presigned_url(
+    url = s3.generate_presigned_url(
         ClientMethod="get_object",
         Params={"Bucket": R2_BUCKET, "Key": storage_key},
-        ExpiresIn=max(60, int(expires_seconds or 900)),
+        ExpiresIn=expires,
     )
+    _presign_cache_put(storage_key, expires, url)
+    return url
+
+
+def presign_get_urls_batch(storage_keys, expires_seconds: int = 900) -> list:
+    """
+    Presign many keys with a single client/signer setup instead of paying
+    the per-call construction cost N times. Returns URLs in input order;
+    empty keys map to "".
+    """
+    keys = list(storage_keys)
+    if not keys:
+        return []
+    expires = max(60, int(expires_seconds or 900))
+
+    urls = []
+    s3 = None
+    for k in keys:
+        if not k:
+            urls.append("")
+            continue
+        cached = _presign_cache_get(k, expires)
+        if cached is not None:
+            urls.append(cached)
+            continue
+        if s3 is None:
+            s3 = _client()
+        url = s3.generate_presigned_url(
+            ClientMethod="get_object",
+            Params={"Bucket": R2_BUCKET, "Key": k},
+            ExpiresIn=expires,
+        )
+        _presign_cache_put(k, expires, url)
+        urls.append(url)
+    return urls
 
 